@@ -27,7 +27,7 @@ from typing import Callable, Dict, Any, Optional, List
 PROJECT_ROOT = Path(__file__).resolve().parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.evaluation.strategy_evaluator import eval_strategy, quick_eval
+from src.evaluation.strategy_evaluator import configure_logging, eval_strategy, quick_eval
 
 
 def create_logged_strategy(strategy_func: Callable, name: str, log_io: bool = False) -> Callable:
@@ -307,14 +307,9 @@ def setup_logging(verbose: bool = False, debug: bool = False) -> None:
     else:
         level = logging.WARNING
     
-    # 配置根日志记录器，使用与 simple agent 相同的格式
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(levelname)s - %(message)s',  # 简化格式，与 simple agent 一致
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    # 配置根日志记录器，使用与 simple agent 相同的格式；日志经队列由后台线程
+    # 写到 stdout，MQTT 回调等线程记录日志时不必等待输出
+    configure_logging(level, sys.stdout)
     
     # 设置特定模块的日志级别
     if verbose or debug:
@@ -391,6 +386,12 @@ def main():
         help='离线模式（不使用MQTT）'
     )
     
+    parser.add_argument(
+        '--fast-forward',
+        action='store_true',
+        help='离线模式下不按真实时间推进仿真，尽快跑完（需配合 --no-mqtt）'
+    )
+    
     parser.add_argument(
         '--no-faults',
         action='store_true',
@@ -507,12 +508,13 @@ def main():
     eval_kwargs = {
         'no_mqtt': args.no_mqtt,
         'no_faults': args.no_faults,
+        'fast_forward': args.fast_forward,
     }
     
     if args.topic_root:
         eval_kwargs['root_topic'] = args.topic_root
     
-    logger.info(f"评测参数: 评测时间={args.time}秒（真实时间）, 离线模式={args.no_mqtt}, 无故障模式={args.no_faults}")
+    logger.info(f"评测参数: 评测时间={args.time}秒（真实时间）, 离线模式={args.no_mqtt}, 离线快进={args.fast_forward}, 无故障模式={args.no_faults}")
     
     try:
         if args.compare or len(strategies) > 1:
@@ -129,6 +129,8 @@ class MultiLineFactorySimulation:
                 # For fixed duration runs, just clean up without printing scores again
                 logger.info("🧹 Cleaning up resources...")
                 self.running = False
+                if self.command_handler:
+                    self.command_handler.close()
                 if self.mqtt_client:
                     self.mqtt_client.disconnect()
                 logger.info("👋 Factory Simulation stopped")
@@ -142,6 +144,9 @@ class MultiLineFactorySimulation:
         # if self.factory:
         #     self.factory.print_final_scores()
 
+        if self.command_handler:
+            self.command_handler.close()
+
         if self.mqtt_client:
             self.mqtt_client.disconnect()
 
@@ -67,4 +67,9 @@ You MUST respond with a JSON command in the following format:
 | `load`       | Load product from a station  | AGV ID | `{"action": "load", "target": "AGV_1", "params": {"product_id": "prod_1_1ee7ce46"}}`                 |
 | `get_result` | Get current factory KPI      | any    | `{"action": "get_result", "target": "factory", "params": {}}`                                       |
 
+## Input
+
+Each user message is exactly one JSON message received from the factory.
+Analyze the message and the current factory state (if available) and decide the next best action.
+Respond with a single, valid JSON command. Do not include any other text or explanation.
 """
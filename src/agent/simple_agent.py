@@ -1,11 +1,17 @@
 import os
 import sys
 import json
-import time
+import queue
+import signal
 import logging
 import asyncio
+import threading
+import functools
+import importlib.util
+from collections import OrderedDict
 from pathlib import Path
 from dotenv import load_dotenv
+from pydantic import TypeAdapter
 
 # Assuming 'agents' is a new library provided by the user.
 # If this causes an error, the user needs to install it.
@@ -21,45 +27,114 @@ from config.settings import MQTT_BROKER_HOST, MQTT_BROKER_PORT
 from config.schemas import AgentCommand
 from src.agent.prompt import SYSTEM_PROMPT
 
-# Configure logger
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Serializes AgentCommand straight to JSON bytes from the compiled core schema
+COMMAND_ADAPTER = TypeAdapter(AgentCommand)
+
+# Upper bound on the number of topics tracked by the duplicate-payload filter
+MAX_TRACKED_TOPICS = 4096
+# Messages buffered between the MQTT network thread and the ingress worker
+INGRESS_QUEUE_SIZE = 10_000
+# HTTP/2 needs the optional 'h2' package; fall back to HTTP/1.1 keep-alive without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Production lines of the multi-line factory
+LINE_IDS = ("line1", "line2", "line3")
 
 class SimpleAgent:
-    def __init__(self, root_topic):
+    def __init__(self, root_topic, http_client=None):
         self.topic_manager = TopicManager(root_topic)
         self.client_id = f"{root_topic}_simple_agent"
         self.mqtt_client = MQTTClient(MQTT_BROKER_HOST, MQTT_BROKER_PORT, self.client_id)
+        # Per-line topics never change, so build them once
+        self._command_topics = {
+            line: self.topic_manager.get_agent_command_topic(line) for line in LINE_IDS
+        }
         self.agent = Agent(
             name="FactoryControlAgent",
             instructions=SYSTEM_PROMPT,
             model="kimi-k2-0711-preview",
             output_type=AgentOutputSchema(AgentCommand, strict_json_schema=False),
         )
+        # Everything except the user input is fixed for this agent, so bind it once
+        self._run_agent = functools.partial(Runner.run, self.agent)
+
+        # One long-lived event loop for all agent calls, so the OpenAI client's
+        # connection pool survives between messages instead of being rebuilt.
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="agent-loop", daemon=True
+        )
+        self._loop_thread.start()
+        # Shared HTTP client of the LLM provider, closed on the agent loop at shutdown
+        self._http_client = http_client
+
+        self._stop_event = threading.Event()
+
+        # Hash of the last payload seen per topic (LRU-bounded)
+        self._last_hash: OrderedDict[str, int] = OrderedDict()
+
+        # The MQTT network thread only enqueues; decoding and dispatch happen
+        # on a worker so a slow message never stalls the client.
+        self._ingress: queue.Queue = queue.Queue(maxsize=INGRESS_QUEUE_SIZE)
+        self.dropped_messages = 0
+        self._ingress_thread = threading.Thread(
+            target=self._drain_ingress, name="agent-ingress", daemon=True
+        )
+        self._ingress_thread.start()
+
+    def _is_duplicate(self, topic: str, payload: bytes) -> bool:
+        """Returns True if the payload is identical to the last one on this topic."""
+        payload_hash = hash(payload)
+        if self._last_hash.get(topic) == payload_hash:
+            self._last_hash.move_to_end(topic)
+            return True
+        self._last_hash[topic] = payload_hash
+        self._last_hash.move_to_end(topic)
+        if len(self._last_hash) > MAX_TRACKED_TOPICS:
+            self._last_hash.popitem(last=False)
+        return False
 
     def on_message(self, topic: str, payload: bytes):
         try:
-            message = json.loads(payload.decode())
-            logging.info(f"Received message on topic {topic}: {message}")
+            self._ingress.put_nowait((topic, payload))
+        except queue.Full:
+            self.dropped_messages += 1
+            logging.warning(f"Ingress queue is full, dropping message on topic {topic}")
+
+    def _drain_ingress(self):
+        while True:
+            item = self._ingress.get()
+            if item is None:
+                break
+            self._process_message(*item)
+
+    def _process_message(self, topic: str, payload: bytes):
+        # Re-delivered or repeated snapshots never need another agent run
+        if self._is_duplicate(topic, payload):
+            return
+        try:
+            # json.loads accepts the raw UTF-8 bytes; no intermediate str needed
+            message = json.loads(payload)
+            # Lazy formatting: the message repr is only built when DEBUG is on
+            logging.debug("Received message on topic %s: %s", topic, message)
 
-            # Run the agent logic in an async context
-            asyncio.run(self.handle_message(topic, message))
+            # Run the agent logic on the shared event loop and wait for it, so
+            # orders are handled one at a time and commands go out in order
+            asyncio.run_coroutine_threadsafe(
+                self.handle_message(topic, message), self._loop
+            ).result()
 
         except json.JSONDecodeError:
             logging.error(f"Could not decode JSON from topic {topic}")
         except Exception as e:
-            logging.error(f"An error occurred in on_message: {e}")
+            logging.error(f"An error occurred while processing message: {e}")
 
     async def handle_message(self, topic: str, message: dict):
-        # For this MVP, we'll just handle order messages
-        if "orders" not in topic:
-            return
-
         line_id = "line1" # Defaulting to line1 for MVP
         user_prompt = self.create_prompt(message)
 
         try:
             logging.info("Running agent with new message...")
-            result = await Runner.run(self.agent, input=user_prompt)
+            result = await self._run_agent(input=user_prompt)
             
             response_content = ""
             if result is None:
@@ -72,10 +147,11 @@ class SimpleAgent:
 
             if response_content:
                 logging.info(f"Extracted command: {response_content}")
-                command_topic = self.topic_manager.get_agent_command_topic(line_id)
-                # Convert AgentCommand object to dict for JSON serialization
-                command_dict = response_content.model_dump() if hasattr(response_content, 'model_dump') else response_content.__dict__
-                self.mqtt_client.publish(command_topic, json.dumps(command_dict))
+                command_topic = self._command_topics[line_id]
+                # The agent's output type is AgentCommand; dump_json yields bytes
+                # directly, without an intermediate str to encode
+                command_bytes = COMMAND_ADAPTER.dump_json(response_content)
+                self.mqtt_client.publish(command_topic, command_bytes)
                 logging.info(f"Published command to {command_topic}")
             else:
                 logging.error("Agent did not return a valid JSON command.")
@@ -85,57 +161,74 @@ class SimpleAgent:
 
 
     def create_prompt(self, message: dict) -> str:
-        """Creates a user prompt for the LLM based on the incoming message."""
-        return f"""
-        The following message was received:
-        {json.dumps(message, indent=2)}
-        
-        Analyze the message and the current factory state (if available) and decide the next best action.
-        Respond with a single, valid JSON command. Do not include any other text or explanation.
         """
+        Creates a user prompt for the LLM based on the incoming message.
+        The task instructions live in SYSTEM_PROMPT so the request prefix stays
+        byte-identical across calls and can be served from the provider's prompt cache.
+        """
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    def stop(self):
+        """Requests the agent to shut down; safe to call from any thread."""
+        self._stop_event.set()
 
     def run(self):
         self.mqtt_client.connect()
         
         root_topic = self.topic_manager.root
-        # Subscribe to all relevant topics
-        for line in ["line1", "line2", "line3"]:
-            self.mqtt_client.subscribe(f"{root_topic}/{line}/station/+/status", self.on_message)
-            self.mqtt_client.subscribe(f"{root_topic}/{line}/agv/+/status", self.on_message)
-            self.mqtt_client.subscribe(f"{root_topic}/{line}/conveyor/+/status", self.on_message)
-            self.mqtt_client.subscribe(f"{root_topic}/{line}/alerts", self.on_message)
-            self.mqtt_client.subscribe(self.topic_manager.get_agent_response_topic(line), self.on_message)
-
-        self.mqtt_client.subscribe(f"{root_topic}/warehouse/+/status", self.on_message)
+        # The agent only acts on new orders; status, KPI and response traffic
+        # would be received, decoded and discarded, so it is not subscribed.
+        # Give any topic added here its own handler.
         self.mqtt_client.subscribe(self.topic_manager.get_order_topic(), self.on_message)
-        self.mqtt_client.subscribe(self.topic_manager.get_kpi_topic(), self.on_message)
-        self.mqtt_client.subscribe(self.topic_manager.get_result_topic(), self.on_message)
 
-        logging.info(f"Agent is running and subscribed to all topics under {root_topic}")
+        logging.info(f"Agent is running and subscribed to order topics under {root_topic}")
         
+        # Block until SIGINT/SIGTERM instead of waking up to poll
+        signal.signal(signal.SIGINT, lambda *_: self.stop())
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
         try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
+            self._stop_event.wait()
             logging.info("Agent shutting down.")
         finally:
             self.mqtt_client.disconnect()
+            try:
+                self._ingress.put_nowait(None)
+            except queue.Full:
+                pass
+            if self._http_client is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(
+                        self._http_client.aclose(), self._loop
+                    ).result(timeout=5)
+                except Exception as e:
+                    logging.warning(f"Failed to close HTTP client: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
 
 def main():
-    import os
-    from dotenv import load_dotenv
+    import httpx
     from openai import AsyncOpenAI
     from agents import set_default_openai_client
     from agents import set_tracing_disabled
     from agents import set_default_openai_api
 
-
+    # Configure logger here rather than at import, so importing the agent
+    # module does not reconfigure the root logger of the host program
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
     load_dotenv()
 
     set_tracing_disabled(True)
+    # One pooled connection set for every agent call, so TLS sessions are reused
+    http_client = httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=30.0,
+    )
     custom_client = AsyncOpenAI(
-        base_url="https://api.moonshot.cn/v1", api_key=os.getenv("MOONSHOT_API_KEY")
+        base_url="https://api.moonshot.cn/v1",
+        api_key=os.getenv("MOONSHOT_API_KEY"),
+        http_client=http_client,
     )
     set_default_openai_client(custom_client)
     set_default_openai_api("chat_completions")
@@ -148,7 +241,7 @@ def main():
         or "NLDF_AGENT_TEST"
     )
     
-    agent = SimpleAgent(root_topic)
+    agent = SimpleAgent(root_topic, http_client=http_client)
     agent.run()
 
 if __name__ == "__main__":
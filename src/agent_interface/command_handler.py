@@ -39,8 +39,8 @@ class CommandHandler:
         Parses the JSON and validates it against the AgentCommand schema.
         """
         try:
-            # Parse JSON payload
-            command_data = json.loads(payload.decode("utf-8"))
+            # Parse JSON payload; json.loads takes the UTF-8 bytes directly
+            command_data = json.loads(payload)
 
             try:
                 # Validate using Pydantic schema
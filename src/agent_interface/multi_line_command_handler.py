@@ -1,14 +1,88 @@
 # src/agent_interface/multi_line_command_handler.py
+import re
+import sys
 import json
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 
-from config.schemas import AgentCommand, SystemResponse
+from config.schemas import AgentCommand
+from src.game_logic.kpi_calculator import format_final_scores
 from src.utils.mqtt_client import MQTTClient
 from src.utils.topic_manager import TopicManager
 
 logger = logging.getLogger(__name__)
 
+# Bound once at import: skips the per-call model_validate indirection
+_validate_command = AgentCommand.__pydantic_validator__.validate_python
+
+# json.dumps builds a new encoder whenever non-default options are passed;
+# responses reuse this one
+_encode_response = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+# Responses are flushed when this many are pending, or after the interval below
+PUBLISH_BATCH_SIZE = 32
+PUBLISH_FLUSH_INTERVAL = 0.005  # seconds
+
+# Entries of KPICalculator.get_final_score() published on the result topic,
+# in publishing order (raw metrics are left out)
+RESULT_SCORE_KEYS = (
+    "total_score",
+    "efficiency_score",
+    "efficiency_components",
+    "quality_cost_score",
+    "quality_cost_components",
+    "agv_score",
+    "agv_components",
+)
+
+
+def _round_score(value):
+    """Rounds a score, or every entry of a score-components dict, to 2 decimals."""
+    if isinstance(value, dict):
+        return {k: round(v, 2) for k, v in value.items()}
+    return round(value, 2)
+
+
+# Error texts of the load/unload device resolution, per action. The two actions
+# have always worded these differently, and agents may match on the text.
+_NO_DEVICE_MESSAGES = {
+    "load": "No device can be operated for {agv_id} at position {point}",
+    "unload": "No device mapping found for AGV {agv_id} at position {point}",
+}
+_DEVICE_NOT_FOUND_MESSAGES = {
+    "load": "Device '{device_id}' not found in line '{line}' or factory.",
+    "unload": "Device {device_id} not found in line {line} or factory.",
+}
+
+
+# SimPy processes spawned by the command handlers. They are plain module-level
+# generators taking explicit arguments, so no closure is built per command.
+# `publish` is the handler's _publish_response.
+
+
+def _move_process(publish, agv, target_point, line_name, command_id):
+    success, message = yield from agv.move_to(target_point)
+    publish(line_name, command_id, message)
+
+
+def _load_process(publish, agv, device, buffer_type, product_id, line_name, command_id):
+    success, message, _ = yield from agv.load_from(device, buffer_type, product_id)
+    publish(line_name, command_id, message)
+    return success, message
+
+
+def _unload_process(publish, agv, device, buffer_type, line_name, command_id):
+    success, message, _ = yield from agv.unload_to(device, buffer_type)
+    publish(line_name, command_id, message)
+
+
+def _charge_process(publish, agv, target_level, line_name, command_id):
+    success, message = yield from agv.voluntary_charge(target_level)
+    publish(line_name, command_id, message)
+
 
 class MultiLineCommandHandler:
     """
@@ -27,45 +101,117 @@ class MultiLineCommandHandler:
         self.mqtt_client = mqtt_client
         self.topic_manager = topic_manager
 
-        # Subscribe to a wildcard topic for all lines
+        # Bound once: the environment never changes
+        self._spawn = self.factory.env.process
+
+        # Action name -> handler; all handlers take (line, target, params, command_id)
+        self._action_handlers = {
+            "move": self._handle_move_agv,
+            "load": self._handle_load_agv,
+            "unload": self._handle_unload_agv,
+            "charge": self._handle_charge_agv,
+            "get_result": self._handle_get_result,
+        }
+
+        # Response topic per line_id (None -> general), filled on first use
+        self._response_topics: Dict[Optional[str], str] = {}
+        self._result_topic = self.topic_manager.get_result_topic()
+        # (line name, device id) -> device; devices are fixed once the factory is built
+        self._device_cache: Dict[tuple, Any] = {}
+
+        # Responses are queued and published in batches by a background thread
+        self._publish_queue: deque = deque()
+        # Set whenever something is queued; the publisher sleeps on it while idle
+        self._publish_pending = threading.Event()
+        # Set once a full batch is queued, to flush before the interval ends
+        self._publish_wakeup = threading.Event()
+        # Cleared by close() to let the publisher thread exit
+        self._publisher_running = True
+        self._publisher_thread = threading.Thread(
+            target=self._drain_publish_queue, name="response-publisher", daemon=True
+        )
+        self._publisher_thread.start()
+
+        # Cheap prefix test that rejects foreign topics before any parsing
+        self._topic_prefix = self.topic_manager.agent_command_prefix()
+        # Compiled once; parsing the line out of each command topic is a single match
+        self._command_topic_re = re.compile(
+            self.topic_manager.agent_command_topic_regex()
+        )
+
+        # Commands are decoded and executed off the MQTT network thread. A single
+        # worker keeps them in arrival order and the simulation touched by one thread.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="command-worker"
+        )
+
+        # Subscribe to a wildcard topic for all lines. Further topics belong in
+        # this list so they share one SUBSCRIBE round trip.
         command_topic = self.topic_manager.get_agent_command_topic_wildcard()
-        self.mqtt_client.subscribe(command_topic, self._handle_command_message)
+        self.mqtt_client.subscribe_many(
+            [(command_topic, 0, self._handle_command_message)]
+        )
         logger.info(
-            f"MultiLineCommandHandler initialized and subscribed to {command_topic}"
+            "MultiLineCommandHandler initialized and subscribed to %s", command_topic
         )
 
     def _handle_command_message(self, topic: str, payload: bytes):
         """
         Callback for incoming MQTT command messages.
-        Parses the topic to get line_id and device_id, then validates the payload.
+        Hands the message to the command worker so the network thread returns at once.
         """
+        try:
+            self._executor.submit(self._process_command_message, topic, payload)
+        except RuntimeError:
+            # close() has shut the worker down; the handler is finished
+            logger.debug("Handler closed, dropping command on %s", topic)
+
+    def _process_command_message(self, topic: str, payload: bytes):
+        """
+        Parses the topic to get line_id, then validates and executes the payload.
+        """
+        if not topic.startswith(self._topic_prefix):
+            logger.warning("Ignoring message on non-command topic: %s", topic)
+            return
+
+        command_data = None
         try:
             # Parse the topic to extract line_id and device_id
-            parsed_topic = self.topic_manager.parse_agent_command_topic(topic)
-            if not parsed_topic:
-                logger.error(f"Could not parse command topic: {topic}")
+            topic_match = self._command_topic_re.match(topic)
+            if not topic_match:
+                logger.error("Could not parse command topic: %s", topic)
                 return
 
-            line_id = parsed_topic["line_id"]
+            # Interned so dict lookups keyed by line name hit the identity fast path
+            line_id = sys.intern(topic_match.group("line_id"))
             # device_id is now expected in the command payload's target field
 
-            # Parse JSON payload
-            command_data = json.loads(payload.decode("utf-8"))
+            # Parse JSON payload; json.loads takes the UTF-8 bytes directly
+            command_data = json.loads(payload)
 
             try:
                 # Validate using Pydantic schema
-                command = AgentCommand.model_validate(command_data)
+                command = _validate_command(command_data)
             except Exception as e:
                 msg = f"Failed to validate command: {e}"
                 logger.error(msg)
-                self._publish_response(line_id, command_data.get("command_id"), msg)
+                command_id = (
+                    command_data.get("command_id")
+                    if isinstance(command_data, dict)
+                    else None
+                )
+                self._publish_response(line_id, command_id, msg)
                 return
 
             # No need to check command.target against topic-derived device_id anymore
 
-            logger.debug(
-                f"Received valid command for line '{line_id}': {command.action} for {command.target}"
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Received valid command for line '%s': %s for %s",
+                    line_id,
+                    command.action,
+                    command.target,
+                )
 
             # Route the command to the appropriate handler
             self._execute_command(line_id, command)
@@ -74,15 +220,22 @@ class MultiLineCommandHandler:
             msg = f"Failed to process command: {e}"
             logger.error(msg)
             # We might not have line_id if topic parsing fails, so publish to a general error topic
-            self._publish_response(None, command_data.get("command_id"), msg)
+            command_id = (
+                command_data.get("command_id")
+                if isinstance(command_data, dict)
+                else None
+            )
+            self._publish_response(None, command_id, msg)
 
     def _execute_command(self, line_id: str, command: AgentCommand):
         """
         Executes a validated command by calling the appropriate method on the correct line.
         """
-        action = command.action
+        # Action and device ids key the handler table and device dicts;
+        # interning lets those lookups match on identity
+        action = sys.intern(command.action)
         params = command.params
-        target_device_id = command.target
+        target_device_id = sys.intern(command.target)
         command_id = command.command_id
 
         # Get the correct production line from the factory
@@ -94,20 +247,13 @@ class MultiLineCommandHandler:
             return
 
         try:
-            if action == "move":
-                self._handle_move_agv(line, target_device_id, params, command_id)
-            elif action == "load":
-                self._handle_load_agv(line, target_device_id, params, command_id)
-            elif action == "unload":
-                self._handle_unload_agv(line, target_device_id, params, command_id)
-            elif action == "charge":
-                self._handle_charge_agv(line, target_device_id, params, command_id)
-            elif action == "get_result":
-                self._handle_get_result(line_id, params, command_id)
-            else:
+            handler = self._action_handlers.get(action)
+            if handler is None:
                 msg = f"Unknown action: {action}"
                 logger.warning(msg)
                 self._publish_response(line_id, command_id, msg)
+                return
+            handler(line, target_device_id, params, command_id)
 
         except Exception as e:
             msg = f"Failed to execute command {action}: {e}"
@@ -129,7 +275,7 @@ class MultiLineCommandHandler:
             return
 
         agv = line.agvs.get(agv_id)
-        if not agv:
+        if agv is None:
             self._publish_response(
                 line.name,
                 command_id,
@@ -137,35 +283,37 @@ class MultiLineCommandHandler:
             )
             return
 
-        def move_process():
-            success, message = yield from agv.move_to(target_point)
-            self._publish_response(line.name, command_id, message)
-
-        self.factory.env.process(move_process())
+        self._spawn(
+            _move_process(
+                self._publish_response, agv, target_point, line.name, command_id
+            )
+        )
 
-    def _handle_load_agv(
-        self,
-        line,
-        agv_id: str,
-        params: Dict[str, Any],
-        command_id: Optional[str] = None,
+    def _resolve_agv_op_ctx(
+        self, action: str, line, agv_id: str, command_id: Optional[str]
     ):
-        if agv_id not in line.agvs:
-            msg = f"AGV {agv_id} not found in this line"
-            logger.error(msg)
-            self._publish_response(
-                line.name, command_id, f"AGV {agv_id} not found in line {line.name}"
-            )
-            return
+        """
+        Resolves the AGV and the device it can operate on at its current point,
+        for the given action ("load" or "unload").
+        Returns (agv, device, buffer_type, device_id), or None after publishing
+        an error response.
+        """
         agv = line.agvs.get(agv_id)
+        if agv is None:
+            msg = f"AGV {agv_id} not found in line {line.name}"
+            logger.error(msg)
+            self._publish_response(line.name, command_id, msg)
+            return None
 
         # Get device and buffer from AGV's position mapping
         point_ops = agv.get_point_operations(agv.current_point)
         if not point_ops or not point_ops.get("device"):
-            msg = f"No device can be operated for {agv_id} at position {agv.current_point}"
+            msg = _NO_DEVICE_MESSAGES[action].format(
+                agv_id=agv_id, point=agv.current_point
+            )
             logger.error(msg)
             self._publish_response(line.name, command_id, msg)
-            return
+            return None
 
         device_id = point_ops["device"]
         buffer_type = point_ops.get("buffer")  # May be None for some devices
@@ -175,21 +323,40 @@ class MultiLineCommandHandler:
             self._publish_response(
                 line.name,
                 command_id,
-                f"Device '{device_id}' not found in line '{line.name}' or factory.",
+                _DEVICE_NOT_FOUND_MESSAGES[action].format(
+                    device_id=device_id, line=line.name
+                ),
             )
+            return None
+
+        return agv, device, buffer_type, device_id
+
+    def _handle_load_agv(
+        self,
+        line,
+        agv_id: str,
+        params: Dict[str, Any],
+        command_id: Optional[str] = None,
+    ):
+        ctx = self._resolve_agv_op_ctx("load", line, agv_id, command_id)
+        if ctx is None:
             return
+        agv, device, buffer_type, device_id = ctx
 
-        def load_process():
-            product_id = (
-                params.get("product_id", None) if device_id == "RawMaterial" else None
-            )
-            success, message, _ = yield from agv.load_from(
-                device, buffer_type, product_id
+        product_id = (
+            params.get("product_id", None) if device_id == "RawMaterial" else None
+        )
+        self._spawn(
+            _load_process(
+                self._publish_response,
+                agv,
+                device,
+                buffer_type,
+                product_id,
+                line.name,
+                command_id,
             )
-            self._publish_response(line.name, command_id, message)
-            return success, message
-
-        self.factory.env.process(load_process())
+        )
 
     def _handle_unload_agv(
         self,
@@ -198,40 +365,21 @@ class MultiLineCommandHandler:
         params: Dict[str, Any],
         command_id: Optional[str] = None,
     ):
-        if agv_id not in line.agvs:
-            msg = f"AGV {agv_id} not found in this line"
-            logger.error(msg)
-            self._publish_response(
-                line.name, command_id, f"AGV {agv_id} not found in line {line.name}"
-            )
-            return
-        agv = line.agvs.get(agv_id)
-
-        # Get device and buffer from AGV's position mapping
-        point_ops = agv.get_point_operations(agv.current_point)
-        if not point_ops or not point_ops.get("device"):
-            msg = f"No device mapping found for AGV {agv_id} at position {agv.current_point}"
-            logger.error(msg)
-            self._publish_response(line.name, command_id, msg)
+        ctx = self._resolve_agv_op_ctx("unload", line, agv_id, command_id)
+        if ctx is None:
             return
-
-        device_id = point_ops["device"]
-        buffer_type = point_ops.get("buffer")  # May be None for some devices
-
-        device = self._find_device(line, device_id)
-        if not device:
-            self._publish_response(
+        agv, device, buffer_type, _ = ctx
+
+        self._spawn(
+            _unload_process(
+                self._publish_response,
+                agv,
+                device,
+                buffer_type,
                 line.name,
                 command_id,
-                f"Device {device_id} not found in line {line.name} or factory.",
             )
-            return
-
-        def unload_process():
-            success, message, _ = yield from agv.unload_to(device, buffer_type)
-            self._publish_response(line.name, command_id, message)
-
-        self.factory.env.process(unload_process())
+        )
 
     def _handle_charge_agv(
         self,
@@ -241,7 +389,7 @@ class MultiLineCommandHandler:
         command_id: Optional[str] = None,
     ):
         agv = line.agvs.get(agv_id)
-        if not agv:
+        if agv is None:
             self._publish_response(
                 line.name,
                 command_id,
@@ -258,90 +406,55 @@ class MultiLineCommandHandler:
             )
             target_level = 80.0
 
-        def charge_process():
-            success, message = yield from agv.voluntary_charge(target_level)
-            self._publish_response(line.name, command_id, message)
-
-        self.factory.env.process(charge_process())
+        self._spawn(
+            _charge_process(
+                self._publish_response, agv, target_level, line.name, command_id
+            )
+        )
 
     def _find_device(self, line, device_id: str):
         """
         Find a device first in the line, then in factory global devices.
         Returns the device if found, None otherwise.
         """
-        # First try to find in the current line
-        device = line.all_devices.get(device_id)
-        if device:
+        key = (line.name, device_id)
+        device = self._device_cache.get(key)
+        if device is not None:
             return device
 
-        # If not found in line, search in factory global devices (warehouse, raw_material)
-        device = self.factory.all_devices.get(device_id)
+        # First try to find in the current line, then in factory global devices
+        # (warehouse, raw_material). Misses are not cached.
+        device = line.all_devices.get(device_id) or self.factory.all_devices.get(
+            device_id
+        )
+        if device is not None:
+            self._device_cache[key] = device
         return device
 
     def _handle_get_result(
-        self, line_id: str, params: Dict[str, Any], command_id: Optional[str] = None
+        self,
+        line,
+        target: str,
+        params: Dict[str, Any],
+        command_id: Optional[str] = None,
     ):
         """Handle get result command to retrieve and publish KPI scores."""
+        line_id = line.name
         if self.factory.kpi_calculator:
             final_scores = self.factory.kpi_calculator.get_final_score()
 
             # 打印到终端（与factory.print_final_scores()相同格式）
-            print(f"\n{'=' * 60}")
-            print("🏆 最终竞赛得分")
-            print(f"{'=' * 60}")
-            print(f"生产效率得分 (40%): {final_scores['efficiency_score']:.2f}")
-            print(
-                f"  - 订单完成率: {final_scores['efficiency_components']['order_completion']:.1f}%"
-            )
-            print(
-                f"  - 生产周期效率: {final_scores['efficiency_components']['production_cycle']:.1f}%"
-            )
-            print(
-                f"  - 设备利用率: {final_scores['efficiency_components']['device_utilization']:.1f}%"
-            )
-            print(f"\n质量与成本得分 (30%): {final_scores['quality_cost_score']:.2f}")
-            print(
-                f"  - 一次通过率: {final_scores['quality_cost_components']['first_pass_rate']:.1f}%"
-            )
-            print(
-                f"  - 成本效率: {final_scores['quality_cost_components']['cost_efficiency']:.1f}%"
-            )
-            print(f"\nAGV效率得分 (30%): {final_scores['agv_score']:.2f}")
-            print(
-                f"  - 充电策略效率: {final_scores['agv_components']['charge_strategy']:.1f}%"
-            )
-            print(
-                f"  - 能效比: {final_scores['agv_components']['energy_efficiency']:.1f}%"
-            )
-            print(
-                f"  - AGV利用率: {final_scores['agv_components']['utilization']:.1f}%"
-            )
-            print(f"\n总得分: {final_scores['total_score']:.2f}")
-            print(f"{'=' * 60}\n")
+            print(format_final_scores(final_scores))
 
             # 发布得分到MQTT（不包含原始指标）
-            result_topic = self.topic_manager.get_result_topic()
+            result_topic = self._result_topic
 
             scores_only = {
-                "total_score": round(final_scores["total_score"], 2),
-                "efficiency_score": round(final_scores["efficiency_score"], 2),
-                "efficiency_components": {
-                    k: round(v, 2)
-                    for k, v in final_scores["efficiency_components"].items()
-                },
-                "quality_cost_score": round(final_scores["quality_cost_score"], 2),
-                "quality_cost_components": {
-                    k: round(v, 2)
-                    for k, v in final_scores["quality_cost_components"].items()
-                },
-                "agv_score": round(final_scores["agv_score"], 2),
-                "agv_components": {
-                    k: round(v, 2) for k, v in final_scores["agv_components"].items()
-                },
+                key: _round_score(final_scores[key]) for key in RESULT_SCORE_KEYS
             }
             result_json = json.dumps(scores_only)
 
-            self.mqtt_client.publish(result_topic, result_json)
+            self._publish_nowait(result_topic, result_json)
             print(f"✅ 结果已发布到 {result_topic}")
 
             # Also send a response to confirm the action was completed
@@ -357,11 +470,71 @@ class MultiLineCommandHandler:
     def _publish_response(
         self, line_id: Optional[str], command_id: Optional[str], response_message: str
     ):
-        """Publishes a response to the appropriate MQTT topic."""
-        response_topic = self.topic_manager.get_agent_response_topic(line_id)
-        response_payload = SystemResponse(
-            timestamp=self.factory.env.now,
-            command_id=command_id,
-            response=response_message,
-        ).model_dump_json()
-        self.mqtt_client.publish(response_topic, response_payload)
+        """
+        Publishes a response to the appropriate MQTT topic.
+        The payload has the SystemResponse layout but is encoded directly, since
+        all three fields are produced here and need no validation.
+        """
+        response_topic = self._response_topics.get(line_id)
+        if response_topic is None:
+            response_topic = self.topic_manager.get_agent_response_topic(line_id)
+            self._response_topics[line_id] = response_topic
+        response_payload = _encode_response(
+            {
+                "timestamp": float(self.factory.env.now),
+                "command_id": command_id,
+                "response": response_message,
+            }
+        )
+        self._publish_nowait(response_topic, response_payload)
+
+    def _publish_nowait(self, topic: str, payload: str):
+        """
+        Queues a message for the publisher thread, so the simulation never waits
+        on the MQTT client. Messages go out in the order they were queued.
+        """
+        self._publish_queue.append((topic, payload))
+        self._publish_pending.set()
+        if len(self._publish_queue) >= PUBLISH_BATCH_SIZE:
+            self._publish_wakeup.set()
+
+    def _drain_publish_queue(self):
+        """
+        Publishes queued responses in batches, in the order they were queued.
+        Idle until something is queued, then collects for up to the flush interval.
+        """
+        pending = self._publish_pending
+        wakeup = self._publish_wakeup
+        flush = self.flush_responses
+        while self._publisher_running:
+            pending.wait()
+            pending.clear()
+            wakeup.wait(PUBLISH_FLUSH_INTERVAL)
+            wakeup.clear()
+            flush()
+
+    def close(self):
+        """
+        Finishes the queued commands, publishes every pending response and stops
+        the worker threads. The handler takes no further commands afterwards.
+        """
+        self._executor.shutdown(wait=True)
+        self._publisher_running = False
+        self._publish_pending.set()
+        self._publish_wakeup.set()
+        self._publisher_thread.join()
+        # Anything queued while the publisher was exiting
+        self.flush_responses()
+
+    def flush_responses(self):
+        """Publishes every queued message immediately, on the calling thread."""
+        queue = self._publish_queue
+        popleft = queue.popleft
+        batch = []
+        while queue:
+            try:
+                batch.append(popleft())
+            except IndexError:
+                break
+        if batch:
+            self.mqtt_client.publish_batch(batch)
@@ -7,11 +7,19 @@ the factory simulation and returns KPI results.
 """
 
 import os
+import re
 import sys
 import json
 import time
+import queue
+import atexit
 import logging
+import logging.handlers
 import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque, namedtuple
+from functools import lru_cache
 from pathlib import Path
 from typing import Callable, Dict, Any, Optional, List
 from dotenv import load_dotenv
@@ -27,12 +35,77 @@ from src.utils.config_loader import load_factory_config
 from config.settings import MQTT_BROKER_HOST, MQTT_BROKER_PORT
 from src.agent_interface.multi_line_command_handler import MultiLineCommandHandler
 
-# Configure logger
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Listener thread started by configure_logging(); None until then
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: int = logging.INFO, stream=None):
+    """
+    Installs queued logging on the root logger, unless the application has set
+    up its own. Records are written to the stream (stderr by default) by a
+    listener thread, so the threads that log (MQTT callbacks, inbox worker)
+    never wait on stream I/O.
+    """
+    global _log_listener
+    if _log_listener is not None or logging.getLogger().handlers:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    )
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # The queued record carries only the merged message; the listener adds the rest
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=level, handlers=[queue_handler])
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+
 load_dotenv()
 
+# Compact encoder shared by every outgoing command; json.dumps would build a
+# new encoder per call for non-default options
+_encode_command = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+# Most recent messages kept in StrategyEvaluator.message_buffer
+MESSAGE_BUFFER_SIZE = 8192
+# Incoming messages waiting to be decoded; further messages are dropped when full
+INBOX_SIZE = 16384
+# Strategy commands issued within this window are published together, in seconds
+COMMAND_BATCH_WINDOW = 0.005
+# Production lines of the multi-line factory layout
+LINE_IDS = ("line1", "line2", "line3")
+# get_result command sent by the evaluator at the end of a run
+RESULT_COMMAND_ID = "eval_get_result"
+RESULT_COMMAND_LINE = "line1"
+# Upper bound on the wait for the broker to accept the connection, in seconds
+MQTT_CONNECT_TIMEOUT = 10.0
+# Upper bound on the wait for the broker to acknowledge subscriptions, in seconds
+SUBSCRIBE_TIMEOUT = 2.0
+# Upper bound on each wait for the get_result confirmation and KPI result, in seconds
+RESULT_WAIT_TIMEOUT = 1.0
+
+
+# Raw-payload probe for KPI results, checked before paying for json.loads
+TOTAL_SCORE_NEEDLE = b'"total_score"'
+
+# Entry of StrategyEvaluator.message_buffer; tuple-sized, with named fields
+BufferedMessage = namedtuple("BufferedMessage", "topic message")
+
+# A topic segment naming a production line, e.g. "line2" in "root/line2/agv/AGV_1/status"
+_LINE_SEGMENT_RE = re.compile(r"(?:^|/)(line[^/]*)/")
+
+
+@lru_cache(maxsize=1024)
+def _line_id_from_topic(topic: str) -> Optional[str]:
+    """Returns the first line segment of a topic (not its last segment), or None."""
+    match = _LINE_SEGMENT_RE.search(topic)
+    return match.group(1) if match else None
+
 
 class StrategyEvaluator:
     """
@@ -58,7 +131,40 @@ class StrategyEvaluator:
         self.mqtt_client = None
         self.factory = None
         self.command_handler = None
-        self.message_buffer = []
+        # BufferedMessage entries; older entries are evicted once full
+        self.message_buffer: deque = deque(maxlen=MESSAGE_BUFFER_SIZE)
+        # Total messages received; the buffer above is bounded
+        self._msg_count = 0
+        # Per-line topics built once; strategies address a fixed set of lines
+        self._cmd_topics = {
+            line: self.topic_manager.get_agent_command_topic(line) for line in LINE_IDS
+        }
+        self._resp_topics = {
+            line: self.topic_manager.get_agent_response_topic(line) for line in LINE_IDS
+        }
+        self._result_topic = self.topic_manager.get_result_topic()
+        self._result_response_topic = self._resp_topics[RESULT_COMMAND_LINE]
+        # Topics decoded even while no strategy is active (result collection)
+        self._decode_topics = frozenset(
+            (
+                self._result_response_topic,
+                self._result_topic,
+                self.topic_manager.get_kpi_topic(),
+            )
+        )
+        # Set by _handle_message when the get_result command is confirmed and
+        # when the KPI result arrives on the result topic
+        self._cmd_confirmed = threading.Event()
+        self._result_ready = threading.Event()
+        # Raw (topic, payload) pairs handed over by the MQTT network thread
+        self._inbox: queue.Queue = queue.Queue(maxsize=INBOX_SIZE)
+        self._inbox_thread: Optional[threading.Thread] = None
+        # Set once the broker has acknowledged the evaluator's subscriptions
+        self._subscribed: Optional[threading.Event] = None
+        self.dropped_messages = 0
+        # Strategy commands waiting to be published by the command publisher thread
+        self._cmd_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._cmd_thread: Optional[threading.Thread] = None
         self.strategy_function = None
         self.running = False
         
@@ -79,15 +185,9 @@ class StrategyEvaluator:
         if not self.no_mqtt:
             logger.info(f"Connecting to MQTT Broker at {MQTT_BROKER_HOST}:{MQTT_BROKER_PORT}...")
             self.mqtt_client.connect()
-            # Wait for MQTT connection
-            max_retries = 20
-            retry_interval = 0.5
-            for i in range(max_retries):
-                if self.mqtt_client.is_connected():
-                    logger.info("Successfully connected to MQTT Broker")
-                    break
-                logger.debug(f"Waiting for MQTT connection... ({i + 1}/{max_retries})")
-                time.sleep(retry_interval)
+            # Wait for MQTT connection; returns as soon as the CONNACK arrives
+            if self.mqtt_client.wait_until_connected(timeout=MQTT_CONNECT_TIMEOUT):
+                logger.info("Successfully connected to MQTT Broker")
             else:
                 raise ConnectionError("MQTT connection failed during evaluation setup.")
         else:
@@ -118,54 +218,100 @@ class StrategyEvaluator:
             return
             
         # Subscribe to all status topics like simple agent does
-        for line in ["line1", "line2", "line3"]:
-            topics = [
+        topics = []
+        for line in LINE_IDS:
+            topics += [
                 f"{self.root_topic}/{line}/station/+/status",
                 f"{self.root_topic}/{line}/agv/+/status", 
                 f"{self.root_topic}/{line}/conveyor/+/status",
                 f"{self.root_topic}/{line}/alerts",
-                self.topic_manager.get_agent_response_topic(line)
+                self._resp_topics[line]
             ]
-            
-            for topic in topics:
-                self.mqtt_client.subscribe(topic, self._collect_message)
-                logger.info(f"Subscribing to topic: {topic}")
         
         # Subscribe to global topics
-        global_topics = [
+        topics += [
             f"{self.root_topic}/warehouse/+/status",
             self.topic_manager.get_order_topic(),
             self.topic_manager.get_kpi_topic(),
             self.topic_manager.get_result_topic()
         ]
         
-        for topic in global_topics:
-            self.mqtt_client.subscribe(topic, self._collect_message)
-            logger.info(f"Subscribing to topic: {topic}")
+        # One SUBSCRIBE packet for every topic; the event fires on its SUBACK
+        self._subscribed = self.mqtt_client.subscribe_many(
+            [(topic, 0, self._collect_message) for topic in topics]
+        )
+        
+        logger.info("Agent is running and subscribed to all topics under %s", self.root_topic)
+        
+        self._cmd_thread = threading.Thread(
+            target=self._publish_commands, name="command-publisher", daemon=True
+        )
+        self._cmd_thread.start()
         
-        logger.info(f"Agent is running and subscribed to all topics under {self.root_topic}")
+        self._inbox_thread = threading.Thread(
+            target=self._drain_inbox, name="evaluator-inbox", daemon=True
+        )
+        self._inbox_thread.start()
     
     def _collect_message(self, topic: str, payload: bytes):
+        """
+        MQTT callback: queues the raw message so the network thread returns at once.
+        Decoding and strategy dispatch happen on the inbox worker.
+        """
+        try:
+            self._inbox.put_nowait((topic, payload))
+        except queue.Full:
+            self.dropped_messages += 1
+            logger.warning("Evaluator inbox full, dropped message on topic %s", topic)
+    
+    def _drain_inbox(self):
+        """
+        Handles queued messages until a None sentinel is queued. A single worker
+        keeps messages in arrival order, so strategy functions need not be thread-safe.
+        """
+        get = self._inbox.get
+        handle = self._handle_message
+        while True:
+            item = get()
+            if item is None:
+                return
+            handle(*item)
+    
+    def _handle_message(self, topic: str, payload: bytes):
         """Collect incoming messages for strategy processing."""
+        # Without an active strategy only the result-collection topics matter,
+        # and on the result topic only payloads carrying a score; skip decoding
+        # everything else
+        if not (self.strategy_function and self.running) and (
+            topic not in self._decode_topics
+            or (topic == self._result_topic and TOTAL_SCORE_NEEDLE not in payload)
+        ):
+            self._msg_count += 1
+            return
         try:
-            message = json.loads(payload.decode())
-            self.message_buffer.append({
-                'topic': topic,
-                'message': message,
-                'timestamp': time.time()
-            })
+            # json.loads takes the UTF-8 bytes directly, no intermediate str
+            message = json.loads(payload)
+            self.message_buffer.append(BufferedMessage(topic, message))
+            self._msg_count += 1
+            if topic == self._result_topic and 'total_score' in message:
+                self._result_ready.set()
+            elif (
+                topic == self._result_response_topic
+                and message.get('command_id') == RESULT_COMMAND_ID
+            ):
+                self._cmd_confirmed.set()
             
-            # Log message reception like simple agent does
-            logger.info(f"Received message on topic {topic}: {message}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received message on topic %s: %r", topic, message)
             
             # Process message with strategy if available
             if self.strategy_function and self.running:
                 self._process_with_strategy(topic, message)
                 
         except json.JSONDecodeError:
-            logger.error(f"Could not decode JSON from topic {topic}")
+            logger.error("Could not decode JSON from topic %s", topic)
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
+            logger.error("Error processing message: %s", e)
     
     def _process_with_strategy(self, topic: str, message: Dict[str, Any]):
         """Process a message using the strategy function."""
@@ -174,30 +320,58 @@ class StrategyEvaluator:
             command = self.strategy_function(topic, message)
             
             if command and isinstance(command, dict):
+                if self.no_mqtt:
+                    # Nothing is sent offline, so skip routing and encoding
+                    logger.info("Offline mode - would publish command: %r", command)
+                    return
+                
                 # Determine which line to send command to
                 line_id = self._determine_line_id(topic, command)
-                command_topic = self.topic_manager.get_agent_command_topic(line_id)
+                command_topic = self._cmd_topics.get(
+                    line_id
+                ) or self.topic_manager.get_agent_command_topic(line_id)
                 
-                if not self.no_mqtt:
-                    self.mqtt_client.publish(command_topic, json.dumps(command))
-                    logger.info(f"Published command to {command_topic}")
-                    logger.debug(f"Command details: {command}")
-                else:
-                    logger.info(f"Offline mode - would publish command: {command}")
+                self._cmd_queue.put((command_topic, _encode_command(command)))
+                logger.info("Queued command for %s", command_topic)
+                logger.debug("Command details: %s", command)
                 
         except Exception as e:
-            logger.error(f"Failed to process message with strategy: {e}")
+            logger.error("Failed to process message with strategy: %s", e)
+    
+    def _publish_commands(self):
+        """
+        Publishes queued strategy commands until a None sentinel is queued.
+        Commands issued within COMMAND_BATCH_WINDOW of each other go out as one batch.
+        """
+        get = self._cmd_queue.get
+        publish_batch = self.mqtt_client.publish_batch
+        monotonic = time.monotonic
+        while True:
+            item = get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            deadline = monotonic() + COMMAND_BATCH_WINDOW
+            while (remaining := deadline - monotonic()) > 0:
+                try:
+                    item = get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            publish_batch(batch)
+            if stop:
+                return
     
     def _determine_line_id(self, topic: str, command: Dict[str, Any]) -> str:
         """Determine which line to send the command to based on topic or command content."""
-        # Try to extract line_id from topic
-        topic_parts = topic.split('/')
-        for i, part in enumerate(topic_parts):
-            if part.startswith('line') and i + 1 < len(topic_parts):
-                return part
-        
+        # Try to extract line_id from topic; the topic set is small and static,
+        # so the parse is cached per topic
         # Default to line1 if can't determine
-        return "line1"
+        return _line_id_from_topic(topic) or "line1"
     
     def _get_final_results(self) -> Dict[str, Any]:
         """Get final KPI results from the factory."""
@@ -208,25 +382,30 @@ class StrategyEvaluator:
         try:
             # Send get_result command to trigger KPI calculation
             command = {
-                "command_id": "eval_get_result",
+                "command_id": RESULT_COMMAND_ID,
                 "action": "get_result",
                 "target": "factory",
                 "params": {}
             }
             
             if not self.no_mqtt:
-                command_topic = self.topic_manager.get_agent_command_topic("line1")
-                self.mqtt_client.publish(command_topic, json.dumps(command))
+                self._cmd_confirmed.clear()
+                self._result_ready.clear()
+                command_topic = self._cmd_topics[RESULT_COMMAND_LINE]
+                self.mqtt_client.publish(command_topic, _encode_command(command))
                 
-                # Wait a bit for the result to be published
-                time.sleep(1)
+                # Block until the handler has published the result and confirmed it
+                if not self._result_ready.wait(timeout=RESULT_WAIT_TIMEOUT):
+                    logger.warning("KPI result was not received on the result topic in time")
+                if not self._cmd_confirmed.wait(timeout=RESULT_WAIT_TIMEOUT):
+                    logger.warning("get_result command was not confirmed in time")
             
             # Get scores directly from KPI calculator
             final_scores = self.factory.kpi_calculator.get_final_score()
             return final_scores
             
         except Exception as e:
-            logger.error(f"Error getting final results: {e}")
+            logger.error("Error getting final results: %s", e)
             return {}
     
     def _cleanup(self):
@@ -234,6 +413,27 @@ class StrategyEvaluator:
         logger.info("🧹 Cleaning up evaluation resources...")
         self.running = False
         
+        # Finish the queued messages first; they may still queue commands
+        if self._inbox_thread is not None:
+            try:
+                self._inbox.put(None, timeout=1)
+                self._inbox_thread.join(timeout=1)
+            except queue.Full:
+                logger.warning("Evaluator inbox still full, not waiting for it to drain")
+            self._inbox_thread = None
+        
+        # Let the command publisher flush what is queued before disconnecting
+        if self._cmd_thread is not None:
+            self._cmd_queue.put(None)
+            self._cmd_thread.join(timeout=1)
+            self._cmd_thread = None
+        
+        # Stops the handler's worker threads, which would otherwise keep the
+        # handler and the factory alive after the evaluation
+        if self.command_handler is not None:
+            self.command_handler.close()
+            self.command_handler = None
+        
         if self.mqtt_client and not self.no_mqtt:
             self.mqtt_client.disconnect()
         
@@ -248,7 +448,8 @@ def eval_strategy(
     simulation_time: int,
     root_topic: Optional[str] = None,
     no_mqtt: bool = False,
-    no_faults: bool = True
+    no_faults: bool = True,
+    fast_forward: bool = False
 ) -> Dict[str, Any]:
     """
     Evaluate a strategy function against the factory simulation.
@@ -261,6 +462,8 @@ def eval_strategy(
         root_topic: MQTT topic root. If None, uses environment variables.
         no_mqtt: If True, disables MQTT communication for offline testing.
         no_faults: If True, disables random fault injection.
+        fast_forward: If True together with no_mqtt, runs the simulation as fast as
+                      possible instead of in sync with real time.
     
     Returns:
         Dict containing KPI results and evaluation metrics.
@@ -278,6 +481,7 @@ def eval_strategy(
         results = eval_strategy(my_strategy, 300)  # Run for 5 minutes
         print(f"Total score: {results['total_score']}")
     """
+    configure_logging()
     evaluator = StrategyEvaluator(root_topic, no_mqtt)
     
     try:
@@ -293,35 +497,52 @@ def eval_strategy(
         
         logger.info(f"🚀 Starting strategy evaluation for {simulation_time} seconds (real time)...")
         
-        # Wait a moment for MQTT subscriptions to be fully established
+        # Wait for the broker to acknowledge the subscriptions
         if not evaluator.no_mqtt:
-            time.sleep(2)
-            logger.info("MQTT subscriptions established, starting simulation...")
+            if evaluator._subscribed.wait(timeout=SUBSCRIBE_TIMEOUT):
+                logger.info("MQTT subscriptions established, starting simulation...")
+            else:
+                logger.warning("MQTT subscriptions not acknowledged in time, starting simulation anyway...")
         
-        # Run simulation synchronized with real time (like the original simulation)
-        start_time = time.time()
+        start_time = time.monotonic()
+        # The loop tracks simulated time itself, so env.now is read only once
+        run_factory = evaluator.factory.run
+        sim_start = evaluator.factory.env.now
         evaluator.running = True
         
         try:
-            while evaluator.running and (time.time() - start_time) < simulation_time:
-                # Run simulation for 1 second at a time, synchronized with real time
-                current_sim_time = int(evaluator.factory.env.now)
-                evaluator.factory.run(until=current_sim_time + 1)
-                
-                # Sleep for 1 second to synchronize with real time
-                time.sleep(1)
-                
-                # Check if we should continue
-                elapsed_real_time = time.time() - start_time
-                if elapsed_real_time >= simulation_time:
-                    break
+            if evaluator.no_mqtt and fast_forward:
+                # Nothing outside the process reacts in real time, so let SimPy
+                # jump straight from event to event
+                run_factory(until=sim_start + simulation_time)
+            else:
+                # Run simulation synchronized with real time (like the original
+                # simulation). Simulated second N ends at real time start_time + N;
+                # sleeps are measured against that fixed schedule, so time spent in
+                # factory.run() never accumulates as drift.
+                # The clock is read once per tick, after factory.run()
+                tick = 0
+                elapsed = 0.0
+                while evaluator.running and tick < simulation_time:
+                    # When behind, run every overdue second in a single factory.run() call
+                    tick = min(max(tick + 1, int(elapsed)), simulation_time)
+                    run_factory(until=sim_start + tick)
+                    
+                    elapsed = time.monotonic() - start_time
+                    slack = tick - elapsed
+                    if slack > 0:
+                        time.sleep(slack)
+                        # Woken at the scheduled end of this tick
+                        elapsed = tick
+                    else:
+                        logger.debug("Simulation behind real time by %.3fs", -slack)
                     
         except KeyboardInterrupt:
             logger.info("🛑 Evaluation interrupted by user")
         
         evaluator.running = False
         final_sim_time = evaluator.factory.env.now
-        elapsed_real_time = time.time() - start_time
+        elapsed_real_time = time.monotonic() - start_time
         
         logger.info(f"⏱️ Evaluation completed after {elapsed_real_time:.1f} real seconds (simulation time: {final_sim_time:.1f})")
         
@@ -335,10 +556,12 @@ def eval_strategy(
         # Add evaluation metadata
         results['evaluation_metadata'] = {
             'simulation_time': simulation_time,
+            'final_sim_time': final_sim_time,
             'root_topic': evaluator.root_topic,
-            'messages_processed': len(evaluator.message_buffer),
+            'messages_processed': evaluator._msg_count,
             'no_mqtt': no_mqtt,
-            'no_faults': no_faults
+            'no_faults': no_faults,
+            'fast_forward': fast_forward
         }
         
         logger.info(f"✅ Evaluation completed. Total score: {results.get('total_score', 'N/A')}")
@@ -353,16 +576,68 @@ def eval_strategy(
 
 
 # Convenience function for quick testing
-def quick_eval(strategy_func: Callable, time_seconds: int = 180) -> float:
+def quick_eval(
+    strategy_func: Callable, time_seconds: int = 180, fast_forward: bool = False
+) -> float:
     """
     Quick evaluation that returns just the total score.
     
     Args:
         strategy_func: Strategy function to evaluate
         time_seconds: Evaluation time in real seconds (default: 3 minutes)
+        fast_forward: If True, simulates time_seconds without waiting for real time
     
     Returns:
         Total KPI score as float
     """
-    results = eval_strategy(strategy_func, time_seconds, no_mqtt=True, no_faults=True)
-    return results.get('total_score', 0.0)
\ No newline at end of file
+    results = eval_strategy(
+        strategy_func, time_seconds, no_mqtt=True, no_faults=True, fast_forward=fast_forward
+    )
+    return results.get('total_score', 0.0)
+
+
+def _eval_strategy_worker(args) -> Dict[str, Any]:
+    """Runs one offline evaluation inside a worker process."""
+    strategy_func, simulation_time, root_topic, no_faults, fast_forward = args
+    return eval_strategy(
+        strategy_func,
+        simulation_time,
+        root_topic,
+        no_mqtt=True,
+        no_faults=no_faults,
+        fast_forward=fast_forward,
+    )
+
+
+def eval_strategies_parallel(
+    strategies: List[Callable],
+    simulation_time: int,
+    n_workers: Optional[int] = None,
+    no_faults: bool = True,
+    fast_forward: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate several strategy functions at once, each in its own process.
+    
+    Every evaluation runs offline (no MQTT) with its own simulation and root topic,
+    so the runs cannot interfere with each other.
+    
+    Args:
+        strategies: Strategy functions to evaluate. They must be picklable,
+                    i.e. defined at module level.
+        simulation_time: Duration of each evaluation in real seconds.
+        n_workers: Number of worker processes. Defaults to the CPU count.
+        no_faults: If True, disables random fault injection.
+        fast_forward: If True, runs each simulation without pacing it to real time.
+    
+    Returns:
+        One result dict per strategy, in the order of `strategies`.
+    """
+    jobs = [
+        (strategy_func, simulation_time, f"NLDF_EVAL_{i}", no_faults, fast_forward)
+        for i, strategy_func in enumerate(strategies)
+    ]
+    # Fresh interpreters rather than forked copies of this process's threads and sockets
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as executor:
+        return list(executor.map(_eval_strategy_worker, jobs))
@@ -11,6 +11,33 @@ if TYPE_CHECKING:
     from src.simulation.entities.product import Product
 
 
+# Terminal report of KPICalculator.get_final_score(), filled in with a single
+# str.format call and written with a single print
+FINAL_SCORES_TEMPLATE = (
+    "\n{sep}\n"
+    "🏆 最终竞赛得分\n"
+    "{sep}\n"
+    "生产效率得分 (40%): {s[efficiency_score]:.2f}\n"
+    "  - 订单完成率: {s[efficiency_components][order_completion]:.1f}%\n"
+    "  - 生产周期效率: {s[efficiency_components][production_cycle]:.1f}%\n"
+    "  - 设备利用率: {s[efficiency_components][device_utilization]:.1f}%\n"
+    "\n质量与成本得分 (30%): {s[quality_cost_score]:.2f}\n"
+    "  - 一次通过率: {s[quality_cost_components][first_pass_rate]:.1f}%\n"
+    "  - 成本效率: {s[quality_cost_components][cost_efficiency]:.1f}%\n"
+    "\nAGV效率得分 (30%): {s[agv_score]:.2f}\n"
+    "  - 充电策略效率: {s[agv_components][charge_strategy]:.1f}%\n"
+    "  - 能效比: {s[agv_components][energy_efficiency]:.1f}%\n"
+    "  - AGV利用率: {s[agv_components][utilization]:.1f}%\n"
+    "\n总得分: {s[total_score]:.2f}\n"
+    "{sep}\n"
+)
+
+
+def format_final_scores(final_scores: Dict[str, Any]) -> str:
+    """Renders the final competition scores as the terminal report."""
+    return FINAL_SCORES_TEMPLATE.format(sep="=" * 60, s=final_scores)
+
+
 @dataclass
 class ProductTracking:
     """Track individual product for production cycle calculation."""
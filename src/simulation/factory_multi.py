@@ -1,7 +1,7 @@
 # src/simulation/factory_multi.py
 import os
 import simpy
-from typing import Dict
+from typing import Any, Dict
 
 from src.simulation.line import Line
 from src.game_logic.kpi_calculator import KPICalculator
@@ -45,6 +45,14 @@ class Factory:
         self._create_warehouse_order_generator()
         self._create_production_lines()
 
+        # Line devices by id, for status lookups without scanning every line.
+        # Device ids repeat across lines; like the scan, the first line wins.
+        # Kept apart from all_devices, which holds only the global devices.
+        self._line_device_index: Dict[str, Any] = {}
+        for line in self.lines.values():
+            for device_id, device in line.all_devices.items():
+                self._line_device_index.setdefault(device_id, device)
+
         # Start process to update active faults count
         self.env.process(self._update_active_faults_count())
 
@@ -102,22 +110,23 @@ class Factory:
 
     def get_device_status(self, device_id: str) -> Dict:
         """Get comprehensive device status including faults."""
-        for line in self.lines.values():
-            if device_id in line.all_devices:
-                # This part can be enhanced to call a method on the line object
-                # which in turn calls the device. For now, direct access for simplicity.
-                device = line.all_devices[device_id]
-                return device.get_detailed_status()  # Simplified for now
-        return {}
+        device = self._line_device_index.get(device_id)
+        if device is None:
+            return {}
+        return device.get_detailed_status()  # Simplified for now
 
     def _update_active_faults_count(self):
         """Periodically update the active faults count in KPI calculator."""
+        # Lines and their fault systems are fixed once the factory is built
+        fault_systems = tuple(
+            line.fault_system for line in self.lines.values() if line.fault_system
+        )
         while True:
             # Count total active faults across all lines
-            total_active_faults = 0
-            for line in self.lines.values():
-                if line.fault_system:
-                    total_active_faults += len(line.fault_system.active_faults)
+            total_active_faults = sum(
+                len(fault_system.active_faults)
+                for fault_system in fault_systems
+            )
 
             # Update KPI calculator with the total count
             if self.kpi_calculator:
@@ -3,11 +3,20 @@ Configuration loader for SUPCON Factory Simulation
 Loads configuration from YAML files and provides typed access to configuration data.
 """
 
+import copy
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional
 
 
+@lru_cache(maxsize=8)
+def _parse_yaml(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """parse a yaml file; cached per path and modification time"""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
 class ConfigLoader:
     """simplified config loader - load yaml file to dict"""
 
@@ -23,8 +32,10 @@ class ConfigLoader:
         if not config_file.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_file}")
 
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
+        # Parsed once per file version; callers get their own copy to mutate
+        config = copy.deepcopy(
+            _parse_yaml(str(config_file), config_file.stat().st_mtime_ns)
+        )
 
         # # simple validation for required fields
         # required_sections = ['stations', 'agvs', 'conveyors', 'warehouses']
@@ -1,9 +1,12 @@
 # utils/mqtt_client.py
 import logging
+import threading
 import paho.mqtt.client as mqtt
-from typing import Callable
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from pydantic import BaseModel
 
+from src.utils.mqtt_matcher import MQTTMatcher
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
@@ -23,36 +26,61 @@ class MQTTClient:
         self._client.on_connect = self._on_connect
         self._client.on_disconnect = self._on_disconnect
         self._client.on_message = self._on_message
-        self._message_callbacks = {}
+        self._client.on_subscribe = self._on_subscribe
+        self._message_callbacks = MQTTMatcher()
+        # Resolved callback per concrete topic; topics recur, so the trie is
+        # only walked once per distinct topic.
+        self._callback_cache: Dict[str, Optional[Callable[[str, bytes], None]]] = {}
+        # SUBSCRIBE message id -> event set when the broker's SUBACK arrives
+        self._pending_subacks: Dict[int, threading.Event] = {}
+        self._suback_lock = threading.Lock()
+        # Set while the broker has accepted the connection (CONNACK received)
+        self._connected = threading.Event()
 
     def _on_connect(self, client, userdata, flags, reason_code, properties=None):
         if reason_code == 0:
             logger.info(
                 f"Successfully connected to MQTT Broker at {self._host}:{self._port}"
             )
+            self._connected.set()
         else:
             logger.error(
                 f"Failed to connect to MQTT Broker, reason code: {reason_code}"
             )
 
     def _on_disconnect(self, client, userdata, reason_code, properties=None):
+        self._connected.clear()
         logger.warning(
             f"Disconnected from MQTT Broker with reason code: {reason_code}. Reconnecting..."
         )
 
+    def _on_subscribe(self, client, userdata, mid, *args):
+        # The trailing arguments differ between paho callback API versions
+        with self._suback_lock:
+            event = self._pending_subacks.pop(mid, None)
+        if event is not None:
+            event.set()
+
     def _on_message(self, client, userdata, msg):
         """
         Internal callback to route messages to the appropriate topic-specific callback.
         """
         logger.debug(f"Received message on topic {msg.topic}")
-        # Iterate over subscribed topics and check for a match
-        for topic_filter, callback in self._message_callbacks.items():
-            if mqtt.topic_matches_sub(topic_filter, msg.topic):
-                callback(msg.topic, msg.payload)
-                break
+        callback = self._resolve_callback(msg.topic)
+        if callback is not None:
+            callback(msg.topic, msg.payload)
         else:
             logger.warning(f"No callback registered for message on topic {msg.topic}")
 
+    def _resolve_callback(self, topic: str) -> Optional[Callable[[str, bytes], None]]:
+        """Returns the callback of the first subscription matching the topic."""
+        try:
+            return self._callback_cache[topic]
+        except KeyError:
+            callback = next(self._message_callbacks.iter_match(topic), None)
+            self._callback_cache[topic] = callback
+            return callback
+
     def connect(self):
         """
         Connects to the MQTT broker and starts the network loop in a separate thread.
@@ -90,24 +118,72 @@ class MQTTClient:
 
         logger.info(f"Subscribing to topic: {topic}")
         self._message_callbacks[topic] = callback
+        self._callback_cache.clear()
         self._client.subscribe(topic, qos)
 
+    def subscribe_many(
+        self, subscriptions: List[Tuple[str, int, Callable[[str, bytes], None]]]
+    ):
+        """
+        Subscribes to several topics with a single SUBSCRIBE packet.
+
+        Args:
+            subscriptions (list): (topic, qos, callback) tuples; see subscribe().
+
+        Returns:
+            threading.Event: Set once the broker has acknowledged the subscription.
+                             Never set if the client was not connected, as no
+                             SUBSCRIBE is sent then (the callbacks are still registered).
+        """
+        acknowledged = threading.Event()
+        if not subscriptions:
+            acknowledged.set()
+            return acknowledged
+        for topic, _, callback in subscriptions:
+            if not callable(callback):
+                raise TypeError("Callback must be a callable function")
+
+        logger.info(
+            f"Subscribing to topics: {', '.join(topic for topic, _, _ in subscriptions)}"
+        )
+        for topic, _, callback in subscriptions:
+            self._message_callbacks[topic] = callback
+        self._callback_cache.clear()
+        # Held across the call so the SUBACK cannot be handled before its mid is known
+        with self._suback_lock:
+            result, mid = self._client.subscribe(
+                [(topic, qos) for topic, qos, _ in subscriptions]
+            )
+            if result == mqtt.MQTT_ERR_SUCCESS:
+                self._pending_subacks[mid] = acknowledged
+            elif result == mqtt.MQTT_ERR_NO_CONN:
+                # Expected when running without a broker (offline evaluations)
+                logger.debug("Not subscribing: client not connected")
+            else:
+                logger.error(f"Failed to subscribe: {mqtt.error_string(result)}")
+        return acknowledged
+
     def publish(
-        self, topic: str, payload: str | BaseModel, qos: int = 1, retain: bool = False
+        self,
+        topic: str,
+        payload: str | bytes | BaseModel,
+        qos: int = 1,
+        retain: bool = False,
     ):
         """
         Publishes a message to a topic.
 
         Args:
             topic (str): The topic to publish to.
-            payload (str | BaseModel): The message payload. If it's a Pydantic BaseModel,
+            payload (str | bytes | BaseModel): The message payload. If it's a Pydantic BaseModel,
                                        it will be automatically converted to a JSON string.
+                                       Bytes are sent as-is without re-encoding.
             qos (int): The Quality of Service level for the message.
             retain (bool): Whether the message should be retained by the broker.
         """
         if isinstance(payload, BaseModel):
             message = payload.model_dump_json()
-        elif isinstance(payload, str):
+        elif isinstance(payload, (str, bytes, bytearray)):
             message = payload
         else:
             message = str(payload)
@@ -120,5 +196,37 @@ class MQTTClient:
                 f"Failed to publish to topic {topic}: {mqtt.error_string(result.rc)}"
             )
 
+    def publish_batch(
+        self,
+        messages: Iterable[Tuple[str, str | bytes]],
+        qos: int = 1,
+        retain: bool = False,
+    ):
+        """
+        Publishes already-serialized (topic, payload) pairs back to back, in order.
+
+        Args:
+            messages (Iterable): (topic, payload) pairs; payloads must be str or bytes.
+            qos (int): The Quality of Service level for every message.
+            retain (bool): Whether the messages should be retained by the broker.
+        """
+        publish = self._client.publish
+        count = 0
+        for topic, payload in messages:
+            result = publish(topic, payload, qos, retain)
+            if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                logger.error(
+                    f"Failed to publish to topic {topic}: {mqtt.error_string(result.rc)}"
+                )
+            count += 1
+        logger.debug(f"Published batch of {count} messages")
+
     def is_connected(self):
         return self._client.is_connected()
+
+    def wait_until_connected(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the broker has accepted the connection, or the timeout expires.
+        Returns True if connected.
+        """
+        return self._connected.wait(timeout)
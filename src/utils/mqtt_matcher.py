@@ -0,0 +1,94 @@
+# src/utils/mqtt_matcher.py
+from typing import Any, Dict, Iterator, List
+
+
+class _Node:
+    __slots__ = ("children", "value", "has_value")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.value: Any = None
+        self.has_value = False
+
+
+class MQTTMatcher:
+    """
+    A trie of MQTT topic filters (with '+' and '#' wildcards) mapped to values.
+    Matching a concrete topic walks the trie one segment at a time, so the cost
+    depends on the topic depth rather than the number of registered filters.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+
+    def __setitem__(self, topic_filter: str, value: Any):
+        node = self._root
+        for segment in topic_filter.split("/"):
+            node = node.children.setdefault(segment, _Node())
+        node.value = value
+        node.has_value = True
+
+    def __getitem__(self, topic_filter: str) -> Any:
+        node = self._root
+        for segment in topic_filter.split("/"):
+            node = node.children.get(segment)
+            if node is None:
+                raise KeyError(topic_filter)
+        if not node.has_value:
+            raise KeyError(topic_filter)
+        return node.value
+
+    def __delitem__(self, topic_filter: str):
+        path: List[tuple] = []
+        node = self._root
+        for segment in topic_filter.split("/"):
+            child = node.children.get(segment)
+            if child is None:
+                raise KeyError(topic_filter)
+            path.append((node, segment))
+            node = child
+        if not node.has_value:
+            raise KeyError(topic_filter)
+        node.value = None
+        node.has_value = False
+        # Prune branches that no longer lead to any filter
+        for parent, segment in reversed(path):
+            child = parent.children[segment]
+            if child.has_value or child.children:
+                break
+            del parent.children[segment]
+
+    def __contains__(self, topic_filter: str) -> bool:
+        try:
+            self[topic_filter]
+        except KeyError:
+            return False
+        return True
+
+    def iter_match(self, topic: str) -> Iterator[Any]:
+        """Yields the values of every registered filter that matches the topic."""
+        segments = topic.split("/")
+        # Topics starting with '$' are not matched by leading wildcards
+        skip_wildcards = topic.startswith("$")
+        stack = [(self._root, 0)]
+        while stack:
+            node, index = stack.pop()
+            if index == len(segments):
+                if node.has_value:
+                    yield node.value
+                # 'a/#' also matches 'a'
+                multi = node.children.get("#")
+                if multi is not None and multi.has_value:
+                    yield multi.value
+                continue
+            wildcards_allowed = not (skip_wildcards and index == 0)
+            if wildcards_allowed:
+                multi = node.children.get("#")
+                if multi is not None and multi.has_value:
+                    yield multi.value
+                single = node.children.get("+")
+                if single is not None:
+                    stack.append((single, index + 1))
+            exact = node.children.get(segments[index])
+            if exact is not None:
+                stack.append((exact, index + 1))
@@ -1,4 +1,5 @@
 # src/utils/topic_manager.py
+import re
 from typing import Dict, Optional
 
 
@@ -62,6 +63,17 @@ class TopicManager:
         """Generates the specific command topic for a given line."""
         return f"{self.root}/command/{line_id}"
 
+    def agent_command_prefix(self) -> str:
+        """Returns the prefix shared by every agent command topic."""
+        return f"{self.root}/command/"
+
+    def agent_command_topic_regex(self) -> str:
+        """
+        Returns a regex matching a specific agent command topic, with the line
+        captured in the 'line_id' group. Expected format: {root}/command/{line_id}
+        """
+        return rf"^{re.escape(self.root)}/command/(?P<line_id>[^/]+)$"
+
     def parse_agent_command_topic(self, topic: str) -> Optional[Dict[str, str]]:
         """
         Parses an agent command topic to extract line_id.
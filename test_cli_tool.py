@@ -80,6 +80,12 @@ def main():
             "策略比较模式"
         ),
         
+        # 离线快进测试（不等待真实时间）
+        (
+            ["python", "eval_strategy.py", "--builtin", "simple", "--time", "300", "--no-mqtt", "--fast-forward"],
+            "离线快进评测"
+        ),
+        
         # 调试模式测试
         (
             ["python", "eval_strategy.py", "--builtin", "simple", "--time", "20", "--debug", "--log-strategy"],
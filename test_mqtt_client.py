@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+测试 MQTTClient 的批量订阅、批量发布与连接等待（不需要 MQTT Broker）
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to sys.path
+PROJECT_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import paho.mqtt.client as mqtt
+
+from src.utils.mqtt_client import MQTTClient
+
+
+class FakePahoClient:
+    """记录调用的 paho 客户端替身，可指定 subscribe 的返回码"""
+
+    def __init__(self, subscribe_rc=mqtt.MQTT_ERR_SUCCESS):
+        self.subscribe_rc = subscribe_rc
+        self.subscribed = []
+        self.published = []
+        self._next_mid = 1
+
+    def subscribe(self, topics):
+        self.subscribed.append(topics)
+        if self.subscribe_rc != mqtt.MQTT_ERR_SUCCESS:
+            return self.subscribe_rc, None
+        mid = self._next_mid
+        self._next_mid += 1
+        return mqtt.MQTT_ERR_SUCCESS, mid
+
+    def publish(self, topic, payload, qos, retain):
+        self.published.append((topic, payload, qos, retain))
+        return SimpleNamespace(rc=mqtt.MQTT_ERR_SUCCESS)
+
+
+def _make_client(fake):
+    client = MQTTClient("localhost", 1883, "test_client")
+    client._client = fake
+    return client
+
+
+def _deliver(client, topic, payload=b"{}"):
+    client._on_message(None, None, SimpleNamespace(topic=topic, payload=payload))
+
+
+def test_subscribe_many():
+    """一次 SUBSCRIBE 发送全部主题，SUBACK 到达后事件置位，消息路由到对应回调"""
+    fake = FakePahoClient()
+    client = _make_client(fake)
+    received = []
+    acknowledged = client.subscribe_many(
+        [
+            ("root/command/+", 0, lambda t, p: received.append(("command", t))),
+            ("root/+/agv/+/status", 1, lambda t, p: received.append(("agv", t))),
+        ]
+    )
+    assert fake.subscribed == [[("root/command/+", 0), ("root/+/agv/+/status", 1)]]
+    assert not acknowledged.is_set()
+
+    client._on_subscribe(None, None, 1, [0, 1])
+    assert acknowledged.is_set()
+
+    _deliver(client, "root/command/line1")
+    _deliver(client, "root/line2/agv/AGV_1/status")
+    assert received == [
+        ("command", "root/command/line1"),
+        ("agv", "root/line2/agv/AGV_1/status"),
+    ]
+
+
+def test_subscribe_many_empty():
+    """空列表不发送 SUBSCRIBE，返回已置位的事件"""
+    fake = FakePahoClient()
+    client = _make_client(fake)
+    assert client.subscribe_many([]).is_set()
+    assert fake.subscribed == []
+
+
+def test_subscribe_many_not_connected():
+    """未连接时回调仍然注册，但事件不会置位"""
+    fake = FakePahoClient(subscribe_rc=mqtt.MQTT_ERR_NO_CONN)
+    client = _make_client(fake)
+    received = []
+    acknowledged = client.subscribe_many(
+        [("root/command/+", 0, lambda t, p: received.append(t))]
+    )
+    assert not acknowledged.is_set()
+    _deliver(client, "root/command/line1")
+    assert received == ["root/command/line1"]
+
+
+def test_publish_batch():
+    """按顺序逐条发布，payload 原样传给 paho"""
+    fake = FakePahoClient()
+    client = _make_client(fake)
+    client.publish_batch(
+        [("root/command/line1", '{"a":1}'), ("root/command/line2", b'{"b":2}')]
+    )
+    assert fake.published == [
+        ("root/command/line1", '{"a":1}', 1, False),
+        ("root/command/line2", b'{"b":2}', 1, False),
+    ]
+
+
+def test_wait_until_connected():
+    """CONNACK 成功后返回 True，断开或连接被拒时返回 False"""
+    client = _make_client(FakePahoClient())
+    assert not client.wait_until_connected(timeout=0)
+    client._on_connect(None, None, {}, 5)
+    assert not client.wait_until_connected(timeout=0)
+    client._on_connect(None, None, {}, 0)
+    assert client.wait_until_connected(timeout=0)
+    client._on_disconnect(None, None, 0)
+    assert not client.wait_until_connected(timeout=0)
+
+
+def main():
+    tests = [
+        test_subscribe_many,
+        test_subscribe_many_empty,
+        test_subscribe_many_not_connected,
+        test_publish_batch,
+        test_wait_until_connected,
+    ]
+    success = True
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            success = False
+    return success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+测试 MQTTMatcher 的主题匹配结果与 paho 的 topic_matches_sub 一致
+"""
+
+import sys
+import random
+from pathlib import Path
+
+# Add project root to sys.path
+PROJECT_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from paho.mqtt.client import topic_matches_sub
+
+from src.utils.mqtt_matcher import MQTTMatcher
+
+FILTERS = [
+    "a",
+    "a/b",
+    "a/b/c",
+    "a/+",
+    "a/+/c",
+    "+/b",
+    "+/+",
+    "+",
+    "#",
+    "a/#",
+    "a/b/#",
+    "+/#",
+    "/a",
+    "a/",
+    "+/",
+    "$SYS/#",
+    "$SYS/+",
+    "$SYS/broker/load",
+    "NLDF/command/+",
+    "NLDF/+/agv/+/status",
+    "NLDF/line1/station/+/status",
+]
+
+TOPICS = [
+    "a",
+    "a/b",
+    "a/b/c",
+    "a/b/c/d",
+    "a/x/c",
+    "x/b",
+    "x",
+    "/a",
+    "a/",
+    "/",
+    "$SYS",
+    "$SYS/broker",
+    "$SYS/broker/load",
+    "NLDF/command/line1",
+    "NLDF/command/line1/extra",
+    "NLDF/line2/agv/AGV_1/status",
+    "NLDF/line1/station/StationA/status",
+]
+
+
+def _build_matcher(filters):
+    matcher = MQTTMatcher()
+    for topic_filter in filters:
+        matcher[topic_filter] = topic_filter
+    return matcher
+
+
+def _assert_same_as_paho(matcher, filters, topic):
+    expected = {f for f in filters if topic_matches_sub(f, topic)}
+    actual = set(matcher.iter_match(topic))
+    assert actual == expected, f"{topic!r}: trie {sorted(actual)} != paho {sorted(expected)}"
+
+
+def test_known_topics():
+    """固定用例：覆盖 +、#、a/# 匹配 a、以及 $ 开头的主题"""
+    matcher = _build_matcher(FILTERS)
+    for topic in TOPICS:
+        _assert_same_as_paho(matcher, FILTERS, topic)
+
+
+def test_edge_cases():
+    """关键边界：a/# 匹配 a，通配符不匹配 $SYS 主题"""
+    matcher = _build_matcher(FILTERS)
+    assert "a/#" in set(matcher.iter_match("a"))
+    sys_matches = set(matcher.iter_match("$SYS/broker/load"))
+    assert "#" not in sys_matches
+    assert "+/#" not in sys_matches
+    assert "$SYS/#" in sys_matches
+
+
+def test_random_topics():
+    """随机生成的过滤器与主题，与 paho 的结果逐一比对"""
+    rng = random.Random(1234)
+    segments = ["a", "b", "c", "", "$SYS"]
+    for _ in range(200):
+        filters = set()
+        for _ in range(rng.randint(1, 12)):
+            depth = rng.randint(1, 4)
+            parts = [rng.choice(segments + ["+"]) for _ in range(depth)]
+            if rng.random() < 0.3:
+                parts[-1] = "#"
+            filters.add("/".join(parts))
+        matcher = _build_matcher(filters)
+        for _ in range(20):
+            depth = rng.randint(1, 5)
+            topic = "/".join(rng.choice(segments) for _ in range(depth))
+            _assert_same_as_paho(matcher, filters, topic)
+
+
+def test_delete():
+    """删除过滤器后不再匹配，其余过滤器不受影响"""
+    matcher = _build_matcher(["a/#", "a/b", "a/+"])
+    del matcher["a/b"]
+    assert "a/b" not in matcher
+    assert set(matcher.iter_match("a/b")) == {"a/#", "a/+"}
+    del matcher["a/+"]
+    assert set(matcher.iter_match("a/b")) == {"a/#"}
+
+
+def main():
+    tests = [test_known_topics, test_edge_cases, test_random_topics, test_delete]
+    success = True
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            success = False
+    return success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
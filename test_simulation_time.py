@@ -69,6 +69,47 @@ def main():
         print(f"❌ 测试失败: {e}")
         return False
 
+def test_fast_forward():
+    """测试离线快进：不等待真实时间，但仿真时间完整推进"""
+    from src.evaluation.strategy_evaluator import eval_strategy
+    
+    print("\n🧪 测试离线快进...")
+    print("=" * 50)
+    
+    real_start_time = time.time()
+    
+    simulation_time = 300
+    print(f"开始评测，仿真时间: {simulation_time}秒（快进，不与真实时间同步）")
+    
+    results = eval_strategy(
+        test_strategy,
+        simulation_time,
+        no_mqtt=True,  # 离线测试
+        no_faults=True,
+        fast_forward=True
+    )
+    
+    real_elapsed = time.time() - real_start_time
+    metadata = results.get('evaluation_metadata', {})
+    final_sim_time = metadata.get('final_sim_time')
+    
+    print(f"\n📊 测试结果:")
+    print(f"设定仿真时间: {simulation_time}秒")
+    print(f"结束时仿真时间: {final_sim_time}")
+    print(f"实际耗时: {real_elapsed:.2f}秒")
+    
+    assert real_elapsed < simulation_time / 10, f"快进耗时过长: {real_elapsed:.2f}秒"
+    assert final_sim_time == simulation_time, (
+        f"仿真时间未推进到 {simulation_time}: {final_sim_time}"
+    )
+    print("✅ 快进正确：仿真时间完整推进，且未等待真实时间")
+
 if __name__ == "__main__":
+    try:
+        test_fast_forward()
+        fast_forward_ok = True
+    except Exception as e:
+        print(f"❌ 快进测试失败: {e}")
+        fast_forward_ok = False
     success = main()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    sys.exit(0 if success and fast_forward_ok else 1)